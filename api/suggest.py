@@ -1,25 +1,114 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from openai_client import create_chat
+# Serve with: uvicorn api.suggest:app --workers 4 --loop uvloop --http httptools
+from typing import Any, AsyncIterator, List, Optional
+import msgspec
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from openai_client import acreate_chat, abatch_chat
 
-app = Flask(__name__)
-CORS(app, resources={r"/enhance": {"origins": "*"}})
+app = FastAPI()
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["POST"], allow_headers=["*"])
 
+# Keep SYSTEM as the unchanging first message: providers cache identical
+# prompt prefixes, so repeated calls skip re-prefilling it.
 SYSTEM = "You are a campaign copy editor. Return exactly one sentence, polished, matching a professional civic tone."
+BATCH_SYSTEM = ("You are a campaign copy editor. Polish each numbered sentence, keeping its meaning and length "
+                "similar and matching a professional civic tone. Reply with a JSON object "
+                "{\"sentences\": [...]} holding exactly one polished sentence per input, in input order.")
+
+class EnhanceRequest(msgspec.Struct):
+    sentence: Optional[str] = None
+    sentences: Optional[List[str]] = None
+    stream: bool = False
+
+class EnhanceResponse(msgspec.Struct):
+    enhanced: str
+
+class EnhanceBatchResponse(msgspec.Struct):
+    enhanced: List[str]
+
+class EnhanceDelta(msgspec.Struct):
+    delta: str
+
+class ErrorResponse(msgspec.Struct):
+    error: str
+
+class _BatchReply(msgspec.Struct):
+    sentences: List[str]
+
+_dec = msgspec.json.Decoder(EnhanceRequest)
+_enc = msgspec.json.Encoder()
+
+def _json(obj: Any, status: int = 200) -> Response:
+    return Response(_enc.encode(obj), status_code=status, media_type="application/json")
+
+def _prompt(sentence: str) -> str:
+    return f"Polish this sentence, keep the meaning and length similar:\n\n{sentence}"
+
+async def _sse(stream: Any) -> AsyncIterator[bytes]:
+    # Each token is JSON-encoded so newlines in the text cannot break SSE framing.
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield b"data: " + _enc.encode(EnhanceDelta(delta)) + b"\n\n"
+    yield b"data: [DONE]\n\n"
 
 @app.post("/enhance")
-def enhance():
-    data = request.get_json(force=True) or {}
-    sentence = (data.get("sentence") or "").strip()
+async def enhance(request: Request) -> Response:
+    try:
+        data = _dec.decode(await request.body())
+    except msgspec.DecodeError as e:
+        return _json(ErrorResponse(f"invalid request: {e}"), 400)
+
+    if data.sentences is not None:
+        if not data.sentences or not all(s.strip() for s in data.sentences):
+            return _json(ErrorResponse("sentences must be a non-empty list of non-empty strings"), 400)
+        if data.stream:
+            return _json(ErrorResponse("stream is only supported for a single sentence"), 400)
+        enhanced = await abatch_chat([_prompt(s.strip()) for s in data.sentences], system=SYSTEM, model="gpt-4o-mini")
+        return _json(EnhanceBatchResponse(enhanced))
+
+    sentence = (data.sentence or "").strip()
     if not sentence:
-        return jsonify({"error":"missing sentence"}), 400
+        return _json(ErrorResponse("missing sentence"), 400)
     msgs = [
         {"role":"system","content":SYSTEM},
-        {"role":"user","content":f"Polish this sentence, keep the meaning and length similar:\n\n{sentence}"}
+        {"role":"user","content":_prompt(sentence)}
     ]
-    resp = create_chat(msgs, model="gpt-4o-mini")
+    if data.stream:
+        stream = await acreate_chat(msgs, model="gpt-4o-mini", stream=True)
+        return StreamingResponse(_sse(stream), media_type="text/event-stream")
+    resp = await acreate_chat(msgs, model="gpt-4o-mini")
     text = resp.choices[0].message.content
-    return jsonify({"enhanced": text})
+    return _json(EnhanceResponse(text))
+
+@app.post("/enhance/batch")
+async def enhance_batch(request: Request) -> Response:
+    """Polish many sentences with one completion: the instructions are sent and
+    prefilled once per batch instead of once per sentence."""
+    try:
+        data = _dec.decode(await request.body())
+    except msgspec.DecodeError as e:
+        return _json(ErrorResponse(f"invalid request: {e}"), 400)
+    if not data.sentences or not all(s.strip() for s in data.sentences):
+        return _json(ErrorResponse("sentences must be a non-empty list of non-empty strings"), 400)
+
+    sentences = [s.strip() for s in data.sentences]
+    numbered = "\n".join(f"{i}. {s}" for i, s in enumerate(sentences, start=1))
+    msgs = [
+        {"role":"system","content":BATCH_SYSTEM},
+        {"role":"user","content":numbered}
+    ]
+    resp = await acreate_chat(msgs, model="gpt-4o-mini", response_format={"type":"json_object"})
+    try:
+        enhanced = msgspec.json.decode(resp.choices[0].message.content or "", type=_BatchReply).sentences
+    except msgspec.DecodeError:
+        enhanced = []
+    if len(enhanced) != len(sentences):
+        # The model dropped or merged items; fall back to one call per sentence.
+        enhanced = await abatch_chat([_prompt(s) for s in sentences], system=SYSTEM, model="gpt-4o-mini")
+    return _json(EnhanceBatchResponse(enhanced))
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=5055, debug=True)
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=5055)
@@ -1,16 +1,43 @@
 from __future__ import annotations
-from typing import Any, Callable, Dict, List, Tuple
-import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from graphlib import TopologicalSorter
+import hashlib, inspect, os, pathlib, threading, time
+import orjson
 
 StageFn = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+StageIO = Tuple[Optional[FrozenSet[str]], Optional[FrozenSet[str]]]
 _REGISTRY: Dict[str, StageFn] = {}
+_IO: Dict[str, StageIO] = {}
+_CACHEABLE: set[str] = set()
 
-def register_stage(name: str) -> Callable[[StageFn], StageFn]:
+class PlanStep(NamedTuple):
+    name: str
+    params: Dict[str, Any]
+
+def register_stage(name: str,
+                   reads: Optional[Iterable[str]] = None,
+                   writes: Optional[Iterable[str]] = None,
+                   cacheable: bool = False) -> Callable[[StageFn], StageFn]:
+    """Register a stage. Stages that declare the `data` keys they read and write
+    run on a shallow copy of `data` and only their declared `writes` are merged
+    back, so they may run concurrently with independent neighbours. Stages that
+    declare neither act as barriers: they run alone and their return value
+    replaces `data`.
+
+    `cacheable=True` marks a stage as a pure function of (params, data): its
+    output is memoized on disk under context["cache_dir"] and replayed without
+    calling it. Do not set it on stages with side effects or external inputs."""
     def deco(fn: StageFn) -> StageFn:
         key = name.strip()
         if key in _REGISTRY:
             raise ValueError(f"Stage '{key}' already registered")
         _REGISTRY[key] = fn
+        _IO[key] = (None if reads is None else frozenset(reads),
+                    None if writes is None else frozenset(writes))
+        if cacheable:
+            _CACHEABLE.add(key)
         return fn
     return deco
 
@@ -19,18 +46,112 @@ def get_stage(name: str) -> StageFn:
         raise KeyError(f"Stage '{name}' not found. Known: {sorted(_REGISTRY)}")
     return _REGISTRY[name]
 
+def get_stage_io(name: str) -> StageIO:
+    get_stage(name)
+    return _IO[name]
+
 def list_stages() -> List[str]:
     return sorted(_REGISTRY)
 
-def run_pipeline(plan: List[Tuple[str, Dict[str, Any]]],
+def _depends(later: StageIO, earlier: StageIO) -> bool:
+    (r2, w2), (r1, w1) = later, earlier
+    if r1 is None or w1 is None or r2 is None or w2 is None:
+        return True
+    return bool(r2 & w1 or w2 & (r1 | w1))
+
+def _generations(plan: Sequence[Tuple[str, Dict[str, Any]]]) -> List[List[int]]:
+    """Group plan indices into topological generations; stages within one
+    generation have no read/write conflicts with each other."""
+    ios = [get_stage_io(stage_name) for stage_name, _ in plan]
+    ts: TopologicalSorter[int] = TopologicalSorter()
+    for j in range(len(plan)):
+        ts.add(j, *(i for i in range(j) if _depends(ios[j], ios[i])))
+    ts.prepare()
+    gens: List[List[int]] = []
+    while ts.is_active():
+        ready = sorted(ts.get_ready())
+        gens.append(ready)
+        ts.done(*ready)
+    return gens
+
+@lru_cache(maxsize=None)
+def _fingerprint(fn: StageFn) -> str:
+    # Part of the cache key. The whole module is hashed, so editing a helper or
+    # module-level pattern the stage uses also invalidates its cached outputs.
+    try:
+        src = inspect.getsource(inspect.getmodule(fn) or fn).encode()
+    except (OSError, TypeError):
+        src = fn.__code__.co_code
+    return hashlib.blake2b(src, digest_size=8).hexdigest()
+
+def _cache_file(cache_dir: str, stage_name: str, fn: StageFn,
+                params: Dict[str, Any], data: Dict[str, Any]) -> Optional[pathlib.Path]:
+    try:
+        blob = orjson.dumps({"stage": stage_name, "code": _fingerprint(fn), "params": params, "data": data},
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None  # not JSON-serializable; run uncached
+    key = hashlib.blake2b(blob, digest_size=16).hexdigest()
+    return pathlib.Path(cache_dir) / stage_name / f"{key}.json"
+
+def _cache_blob(out: Dict[str, Any]) -> Optional[bytes]:
+    # Only cache outputs that replay unchanged: sets fail to encode, while
+    # tuples and int keys would come back as lists and str keys.
+    try:
+        blob = orjson.dumps(out, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None
+    return blob if orjson.loads(blob) == out else None
+
+def _call_stage(stage_name: str, data: Dict[str, Any], params: Dict[str, Any],
+                context: Dict[str, Any]) -> Tuple[Dict[str, Any], float, bool]:
+    fn = get_stage(stage_name)
+    t0 = time.perf_counter()
+    cache_dir = context.get("cache_dir")
+    path = _cache_file(cache_dir, stage_name, fn, params, data) if cache_dir and stage_name in _CACHEABLE else None
+    if path is not None and path.exists():
+        return orjson.loads(path.read_bytes()), time.perf_counter() - t0, True
+    out = fn(data, params, context)
+    blob = _cache_blob(out) if path is not None else None
+    if blob is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer thread: concurrent runs may store the same key at once.
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+    return out, time.perf_counter() - t0, False
+
+def _merge(data: Dict[str, Any], stage_name: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a stage's result: barrier stages replace `data` wholesale, declared
+    stages contribute only their `writes` (in the stage's own key order, so the
+    result does not depend on set iteration order)."""
+    _, writes = get_stage_io(stage_name)
+    if writes is None:
+        return out
+    data.update({k: v for k, v in out.items() if k in writes})
+    return data
+
+def run_pipeline(plan: Iterable[Tuple[str, Dict[str, Any]]],
                  data: Dict[str, Any],
                  context: Dict[str, Any]) -> Dict[str, Any]:
     timings: List[Dict[str, Any]] = []
     context.setdefault("timings", timings)
-    for stage_name, params in plan:
-        fn = get_stage(stage_name)
-        t0 = time.perf_counter()
-        data = fn(data, params, context)
-        dt = time.perf_counter() - t0
-        timings.append({"stage": stage_name, "seconds": round(dt, 6)})
+    steps = [PlanStep(*s) for s in plan]
+    for gen in _generations(steps):
+        if len(gen) == 1:
+            step = steps[gen[0]]
+            # Declared stages get a copy, exactly as when they share a generation.
+            arg = data if get_stage_io(step.name)[1] is None else dict(data)
+            out, dt, cached = _call_stage(step.name, arg, step.params, context)
+            data = _merge(data, step.name, out)
+            timings.append({"stage": step.name, "seconds": round(dt, 6), "cached": cached})
+            continue
+        with ThreadPoolExecutor(max_workers=len(gen)) as ex:
+            futs = [ex.submit(_call_stage, steps[i].name, dict(data), steps[i].params, context) for i in gen]
+            results = [f.result() for f in futs]
+        # Merge in plan order so the result does not depend on thread scheduling.
+        for i, (out, dt, cached) in zip(gen, results):
+            step = steps[i]
+            data = _merge(data, step.name, out)
+            timings.append({"stage": step.name, "seconds": round(dt, 6), "cached": cached})
     return data
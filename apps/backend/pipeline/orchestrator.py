@@ -1,9 +1,21 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple
-import importlib, pkgutil, pathlib, tomllib, os, json
-from .base import run_pipeline
+from functools import lru_cache
+import importlib, pkgutil, pathlib, tomllib, os
+import orjson
+from .base import PlanStep, run_pipeline
+
+# Stage packages already walked in this process; the walk is filesystem-bound
+# and registration happens at import, so repeating it is pure overhead.
+_STAGES_LOADED: set[str] = set()
+
+def _reset_stages_for_tests() -> None:
+    _STAGES_LOADED.clear()
+    _parse_plan.cache_clear()
 
 def _auto_import_stages(pkg_root: str = "apps.backend.pipeline.stages") -> None:
+    if pkg_root in _STAGES_LOADED:
+        return
     pkg = importlib.import_module(pkg_root)
     pkg_paths = []
     if hasattr(pkg, "__path__"):
@@ -14,21 +26,29 @@ def _auto_import_stages(pkg_root: str = "apps.backend.pipeline.stages") -> None:
         raise RuntimeError(f"Could not resolve paths for package {pkg_root}")
     for mod in pkgutil.iter_modules(pkg_paths):
         importlib.import_module(f"{pkg_root}.{mod.name}")
+    _STAGES_LOADED.add(pkg_root)
 
-def _load_plan(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+def _load_plan(path: str) -> List[PlanStep]:
     p = pathlib.Path(path)
-    raw = tomllib.load(p.open("rb"))
+    # Keyed on mtime so an edited config is re-read; params are copied so a
+    # stage mutating them cannot leak into later runs.
+    return [PlanStep(s.name, dict(s.params)) for s in _parse_plan(str(p.resolve()), p.stat().st_mtime_ns)]
+
+@lru_cache(maxsize=32)
+def _parse_plan(path: str, mtime_ns: int) -> Tuple[PlanStep, ...]:
+    with open(path, "rb") as f:
+        raw = tomllib.load(f)
     stages = raw.get("stages", [])
-    plan: List[Tuple[str, Dict[str, Any]]] = []
+    plan: List[PlanStep] = []
     for item in stages:
         if isinstance(item, str):
-            plan.append((item, {}))
+            plan.append(PlanStep(item, {}))
         elif isinstance(item, dict) and "name" in item:
             params = {k: v for k, v in item.items() if k != "name"}
-            plan.append((item["name"], params))
+            plan.append(PlanStep(item["name"], params))
         else:
             raise ValueError(f"Invalid stage item: {item}")
-    return plan
+    return tuple(plan)
 
 def run_from_config(pipeline_path: str,
                     env: Dict[str, Any] | None = None) -> Dict[str, Any]:
@@ -36,9 +56,15 @@ def run_from_config(pipeline_path: str,
     plan = _load_plan(pipeline_path)
     context: Dict[str, Any] = {"env": dict(os.environ), "config_path": pipeline_path}
     if env: context["env"].update(env)
+    if context["env"].get("POLIS_CACHE_DISABLE") != "1":
+        context["cache_dir"] = context["env"].get("POLIS_CACHE_DIR") or ".polis_cache/stages"
     data: Dict[str, Any] = {}
     out = run_pipeline(plan, data, context)
-    out_path = context.get("artifact_path") or "artifacts/pipeline_output.json"
-    pathlib.Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-    pathlib.Path(out_path).write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
+    out_path = pathlib.Path(context.get("artifact_path") or "artifacts/pipeline_output.json")
+    blob = orjson.dumps(out, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    # A writer stage (e.g. example_write) records the bytes it wrote; skip the
+    # rewrite unless a later stage changed the output since.
+    if context.get("artifact_bytes") != blob:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(blob)
     return out
@@ -3,10 +3,12 @@ from typing import Any, Dict
 import re
 from ..base import register_stage
 
-@register_stage("example_label")
+_LABEL_RX = re.compile(r"rally|event|town hall", re.I)
+
+@register_stage("example_label", reads=("title", "body"), writes=("primary_label_id", "score"), cacheable=True)
 def example_label(data: Dict[str, Any], params: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
     text = f"{data.get('title','')}\n{data.get('body','')}"
-    label = "ANN.EVT.RALLY" if re.search(r"rally|event|town hall", text, re.I) else "ANN.GEN.STATEMENT"
+    label = "ANN.EVT.RALLY" if _LABEL_RX.search(text) else "ANN.GEN.STATEMENT"
     data["primary_label_id"] = label
     data["score"] = 5.0
     return data
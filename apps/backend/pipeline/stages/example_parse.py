@@ -4,14 +4,22 @@ import pathlib, re
 from datetime import date
 from ..base import register_stage
 
-@register_stage("example_parse")
+# Dashes fold to ASCII before matching; the head is searched first (fixed-width
+# matches, so its first hit is also the first in the full text).
+_DASH_MAP = str.maketrans(dict.fromkeys("\u2010\u2011\u2012\u2013\u2014", "-"))
+_DATE_RX = re.compile(r"(20\d{2})-(\d{2})-(\d{2})")
+_DATE_WINDOW = 4096
+
+@register_stage("example_parse", reads=(), writes=("doc_id", "title", "date", "body", "source"))
 def example_parse(data: Dict[str, Any], params: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
     src = params.get("fixture", "tests/fixtures/sample_press_release.txt")
     text = pathlib.Path(src).read_text(encoding="utf-8")
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    title = lines[0] if lines else "Untitled"
-    dash = r"[-\u2010\u2011\u2012\u2013\u2014]"
-    m = re.search(rf"(20\d{{2}}){dash}(\d{{2}}){dash}(\d{{2}})", text)
+    # One pass: the first non-blank line is the title, the rest stream into body.
+    lines = (s for s in (ln.strip() for ln in text.splitlines()) if s)
+    title = next(lines, "Untitled")
+    body = "\n".join(lines)
+    m = _DATE_RX.search(text[:_DATE_WINDOW].translate(_DASH_MAP))
+    if not m and len(text) > _DATE_WINDOW:
+        m = _DATE_RX.search(text.translate(_DASH_MAP))
     dt = f"{m.group(1)}-{m.group(2)}-{m.group(3)}" if m else date.today().isoformat()
-    body = "\n".join(lines[1:]).strip()
     return {"doc_id": "SAMPLE-SPANBERGER-0001","title": title,"date": dt,"body": body,"source": "fixture://sample_press_release"}
@@ -1,12 +1,15 @@
 from __future__ import annotations
 from typing import Any, Dict
-import json, pathlib
+import pathlib
+import orjson
 from ..base import register_stage
 
 @register_stage("example_write")
 def example_write(data: Dict[str, Any], params: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
     out = params.get("out","artifacts/pipeline_output.json")
     pathlib.Path(out).parent.mkdir(parents=True, exist_ok=True)
-    pathlib.Path(out).write_text(json.dumps(data,indent=2,ensure_ascii=False),encoding="utf-8")
+    blob = orjson.dumps(data,option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    pathlib.Path(out).write_bytes(blob)
     ctx["artifact_path"]=out
+    ctx["artifact_bytes"]=blob
     return data
@@ -1,13 +1,18 @@
 from __future__ import annotations
-import json, os, re, sys, pathlib
-from dataclasses import dataclass, asdict
+import os, re, sys, pathlib
+import msgspec
 from datetime import date
 
 FIXTURE_TXT = os.getenv("POLIS_SMOKE_TXT", "tests/fixtures/sample_press_release.txt")
 ARTIFACT_OUT = os.getenv("POLIS_SMOKE_OUT", "artifacts/smoke_output.json")
 
-@dataclass
-class PressRelease:
+# Same date extraction as the example_parse stage; duplicated so this file still runs as a plain script.
+_DASH_MAP = str.maketrans(dict.fromkeys("\u2010\u2011\u2012\u2013\u2014", "-"))
+_DATE_RX = re.compile(r"(20\d{2})-(\d{2})-(\d{2})")
+_DATE_WINDOW = 4096
+_LABEL_RX = re.compile(r"rally|event|town hall", re.I)
+
+class PressRelease(msgspec.Struct, frozen=True):
     doc_id: str
     title: str
     date: str
@@ -17,19 +22,20 @@ class PressRelease:
     score: float
 
 def _extract_iso_date(text: str) -> str:
-    dash = r"[-\u2010\u2011\u2012\u2013\u2014]"
-    m = re.search(rf"(20\d{{2}}){dash}(\d{{2}}){dash}(\d{{2}})", text)
+    m = _DATE_RX.search(text[:_DATE_WINDOW].translate(_DASH_MAP))
+    if not m and len(text) > _DATE_WINDOW:
+        m = _DATE_RX.search(text.translate(_DASH_MAP))
     if m:
         y, mm, dd = m.group(1), m.group(2), m.group(3)
         return f"{y}-{mm}-{dd}"
     return date.today().isoformat()
 
 def parse_press_release(text: str, source: str) -> PressRelease:
-    lines = [l.strip() for l in text.strip().splitlines() if l.strip()]
-    title = lines[0] if lines else "Untitled"
+    lines = (s for s in (l.strip() for l in text.splitlines()) if s)
+    title = next(lines, "Untitled")
+    body = "\n".join(lines)
     dt = _extract_iso_date(text)
-    body = "\n".join(lines[1:]).strip()
-    primary = "ANN.EVT.RALLY" if re.search(r"rally|event|town hall", text, re.I) else "ANN.GEN.STATEMENT"
+    primary = "ANN.EVT.RALLY" if _LABEL_RX.search(text) else "ANN.GEN.STATEMENT"
     score = 5.0
     doc_id = "SAMPLE-SPANBERGER-0001"
     return PressRelease(
@@ -47,8 +53,9 @@ def main() -> int:
     pr = parse_press_release(text, source)
     out = pathlib.Path(ARTIFACT_OUT)
     out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(asdict(pr), indent=2, ensure_ascii=False), encoding="utf-8")
-    print(json.dumps(asdict(pr), ensure_ascii=False))
+    raw = msgspec.json.encode(pr)
+    out.write_bytes(msgspec.json.format(raw, indent=2))
+    print(raw.decode())
     return 0
 
 if __name__ == "__main__":
@@ -5,11 +5,20 @@ CLI wrapper for plausible-deniability detector.
 - Input: text file or JSONL (auto-detected) via --in or STDIN
 - Output: JSONL to --out or STDOUT, one object per flagged sentence
 - Patterns: external JSON (plausible_deniability_patterns.json)
+- Optional: `pip install google-re2` scans all patterns in one linear-time pass
 """
 
-import sys, re, json, argparse, os
+import sys, re, json, argparse, os, io, itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Iterable
+import orjson
+
+try:
+    import re2
+except ImportError:
+    re2 = None
 
 # ---------- Config / Loader ----------
 
@@ -22,11 +31,37 @@ def compile_cfg(cfg: Dict[str, Any]) -> Dict[str, Any]:
     for p in cfg["patterns"]:
         pat.append({**p, "compiled": re.compile(p["rx"], re.I)})
     cfg["_compiled_patterns"] = pat
+    # Flat (search, id, label, weight) rows: the per-sentence scan then avoids
+    # dict lookups and float() conversions for every pattern it tries.
+    cfg["_scan"] = [(p["compiled"].search, p["id"], p["label"], float(p["weight"])) for p in pat]
+    cfg["_pattern_set"] = compile_pattern_set(cfg["patterns"])
+    b = cfg["boosts"]
+    cfg["_boosts"] = (float(b.get("claiminess", 0.0)), float(b.get("rhetorical_question", 0.0)), float(b.get("max_score", 1.0)))
     cfg["_claimy_rx"] = re.compile("|".join(cfg["claimy_words"]), re.I) if cfg.get("claimy_words") else None
     cfg["_rhet_q_rx"] = re.compile(r"^(?:%s)\b" % "|".join(cfg["rhet_question_stems"]), re.I) if cfg.get("rhet_question_stems") else None
     cfg["_sent_split"] = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9""(\[])')
     return cfg
 
+def compile_pattern_set(patterns: List[Dict[str, Any]]):
+    """RE2 Set over all pattern rx: one DFA walk per sentence reports every
+    pattern that matches, overlaps included. Returns None without google-re2
+    or if any rx uses syntax RE2 lacks (backrefs, lookaround), in which case
+    detect_sentences falls back to one `re` search per pattern. RE2's \\b
+    and \\s are ASCII-only, so the Set is only used on ASCII sentences."""
+    if re2 is None:
+        return None
+    opts = re2.Options()
+    opts.case_sensitive = False
+    opts.log_errors = False
+    rs = re2.Set.SearchSet(opts)
+    try:
+        for p in patterns:
+            rs.Add(p["rx"])
+        rs.Compile()
+    except re2.error:
+        return None
+    return rs
+
 # ---------- Core detector (same logic as tests, config-driven) ----------
 
 def detect_sentences(text: str, cfg: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
@@ -47,24 +82,34 @@ def detect_sentences(text: str, cfg: Dict[str, Any], threshold: float) -> List[D
         offsets.append((idx, idx + len(s), s))
         start = idx + len(s)
 
+    scan, pattern_set = cfg["_scan"], cfg.get("_pattern_set")
+    claimy_rx, rhet_q_rx = cfg.get("_claimy_rx"), cfg.get("_rhet_q_rx")
+    claimy_boost, rhet_boost, max_score = cfg["_boosts"]
+
     for (s_start, s_end, sent) in offsets:
-        matched, score = [], 0.0
         sent_lc = sent.lower()
 
-        for p in cfg["_compiled_patterns"]:
-            if p["compiled"].search(sent_lc):
-                matched.append({"id": p["id"], "label": p["label"]})
-                score += float(p["weight"])
+        # RE2's \b and \s are ASCII-only, so non-ASCII sentences (NBSP, thin
+        # spaces, lone surrogates) take the Unicode-aware `re` scan instead.
+        if pattern_set is not None and sent_lc.isascii():
+            rows = [scan[i] for i in sorted(pattern_set.Match(sent_lc) or ())]
+        else:
+            rows = [r for r in scan if r[0](sent_lc)]
+        # Boosts alone never flag a sentence, so skip their regexes on misses.
+        if not rows:
+            continue
+        matched = [{"id": pid, "label": label} for _, pid, label, _ in rows]
+        score = sum(weight for *_, weight in rows)
 
-        if cfg.get("_claimy_rx") and cfg["_claimy_rx"].search(sent):
-            score += float(cfg["boosts"].get("claiminess", 0.0))
+        if claimy_rx and claimy_rx.search(sent):
+            score += claimy_boost
 
-        if sent.strip().endswith("?") and cfg.get("_rhet_q_rx") and cfg["_rhet_q_rx"].search(sent):
-            score += float(cfg["boosts"].get("rhetorical_question", 0.0))
+        if sent.endswith("?") and rhet_q_rx and rhet_q_rx.search(sent):
+            score += rhet_boost
 
-        score = min(float(cfg["boosts"].get("max_score", 1.0)), score)
+        score = min(max_score, score)
 
-        if matched and score >= threshold:
+        if score >= threshold:
             labels = sorted({m["label"] for m in matched})
             results.append({
                 "span": {"start": s_start, "end": s_end},
@@ -78,13 +123,32 @@ def detect_sentences(text: str, cfg: Dict[str, Any], threshold: float) -> List[D
 
 # ---------- I/O helpers ----------
 
-def iter_jsonl(fp: Iterable[str]) -> Iterable[Dict[str, Any]]:
+def loads_line(line: str) -> Any:
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        # orjson rejects some input the stdlib accepts (lone surrogate escapes
+        # in scraped text, NaN); retry there, which raises if truly invalid.
+        return json.loads(line)
+
+def dumps_line(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj) + b"\n"
+    except TypeError:
+        # Lone surrogates (see loads_line) are not valid UTF-8; the stdlib
+        # writes them as \uXXXX escapes instead.
+        return json.dumps(obj, separators=(",", ":")).encode("ascii") + b"\n"
+
+def iter_lines(fp: Iterable[str]) -> Iterable[str]:
     for line in fp:
         line = line.strip()
-        if not line:
-            continue
+        if line:
+            yield line
+
+def iter_jsonl(fp: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    for line in iter_lines(fp):
         try:
-            yield json.loads(line)
+            yield loads_line(line)
         except json.JSONDecodeError:
             # If auto-detect guessed wrong, caller should force --format text
             raise
@@ -94,14 +158,75 @@ def is_probably_jsonl(sample: str) -> bool:
     if not sample:
         return False
     try:
-        json.loads(sample.splitlines()[0])
+        loads_line(sample.splitlines()[0])
         return True
     except Exception:
         return False
 
-def read_all(path: str) -> str:
-    with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8")) as f:
-        return f.read()
+def open_input(path: str):
+    return sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+
+def read_head(f, size: int = 2000) -> str:
+    """Read at least `size` chars for format sniffing, completed to the end of
+    the line so the head can be chained back in front of the rest of `f`."""
+    head = f.read(size)
+    return head if len(head) < size or head.endswith("\n") else head + f.readline()
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def out_record(doc_id: str, sentence_id: int, rec: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "doc_id": doc_id,
+        "sentence_id": sentence_id,
+        "span": rec["span"],
+        "sentence": rec["sentence"],
+        "score": rec["score"],
+        "labels": rec["labels"],
+        "matched_patterns": rec["matched_patterns"],
+        "meta": meta
+    }
+
+def scan_jsonl_chunk(chunk: List[Tuple[int, str]], cfg: Dict[str, Any], job: Dict[str, Any]) -> bytes:
+    """Parse and detect over a batch of (line_no, raw JSONL line) pairs and
+    return the batch's output as encoded JSONL, so the writer sees one call per
+    batch. Parsing happens here, so in the pool it runs in the workers too."""
+    lines: List[bytes] = []
+    for line_no, line in chunk:
+        obj = loads_line(line)
+        text = obj.get(job["text_field"], "")
+        if not isinstance(text, str) or not text.strip():
+            continue
+        doc_id = str(obj.get(job["id_field"], f"{job['doc_id_base']}#{line_no}"))
+        meta = {"threshold": job["threshold"], "source": job["source"], "jsonl_line": line_no}
+        for sid, rec in enumerate(detect_sentences(text, cfg, job["threshold"]), start=1):
+            lines.append(dumps_line(out_record(doc_id, sid, rec, meta)))
+    return b"".join(lines)
+
+# ---------- Parallel JSONL scan ----------
+
+_WORKER: Dict[str, Any] = {}
+
+def _worker_init(patterns_path: str, job: Dict[str, Any]) -> None:
+    # Compile once per worker; compiled patterns (and re2 Sets) are not pickled.
+    _WORKER["cfg"] = compile_cfg(load_cfg(Path(patterns_path)))
+    _WORKER["job"] = job
+
+def _scan_chunk(chunk: List[Tuple[int, str]]) -> bytes:
+    return scan_jsonl_chunk(chunk, _WORKER["cfg"], _WORKER["job"])
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
 
 # ---------- Main CLI ----------
 
@@ -114,6 +239,8 @@ def main():
     ap.add_argument("--text-field", dest="text_field", default="text", help="JSONL field name containing text.")
     ap.add_argument("--id-field", dest="id_field", default="doc_id", help="Optional JSONL field for document ID.")
     ap.add_argument("--threshold", dest="threshold", type=float, default=None, help="Score threshold (default from patterns JSON).")
+    ap.add_argument("--batch-size", dest="batch_size", type=int, default=1024, help="JSONL records scanned per output batch.")
+    ap.add_argument("--workers", dest="workers", type=int, default=available_cpus(), help="Worker processes for JSONL input (default: usable CPUs).")
     args = ap.parse_args()
 
     pat_path = Path(args.patterns)
@@ -125,63 +252,61 @@ def main():
     threshold = args.threshold if args.threshold is not None else float(cfg["meta"].get("default_threshold", 0.5))
 
     # Prepare writer
-    out_fp = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    # Binary writer: orjson already yields UTF-8 bytes, so skip the text layer.
+    out_fp = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
 
+    in_fp = open_input(args.inp)
     try:
-        # Read input
-        raw = read_all(args.inp)
+        # Only a sample is read up front; JSONL is then streamed line by line.
+        sample = read_head(in_fp)
 
         # Auto-detect format if needed
         fmt = args.fmt
         if fmt == "auto":
-            fmt = "jsonl" if is_probably_jsonl(raw[:2000]) else "text"
+            fmt = "jsonl" if is_probably_jsonl(sample[:2000]) else "text"
 
         doc_id_base = os.path.basename(args.inp) if args.inp not in ("-", "") else "STDIN"
 
         if fmt == "text":
+            raw = sample + in_fp.read()
             flagged = detect_sentences(raw, cfg, threshold)
             # Emit: one JSON record per flagged sentence
-            for i, rec in enumerate(flagged, start=1):
-                out = {
-                    "doc_id": doc_id_base,
-                    "sentence_id": i,
-                    "span": rec["span"],
-                    "sentence": rec["sentence"],
-                    "score": rec["score"],
-                    "labels": rec["labels"],
-                    "matched_patterns": rec["matched_patterns"],
-                    "meta": {"threshold": threshold, "source": args.inp}
-                }
-                out_fp.write(json.dumps(out, ensure_ascii=False) + "\n")
+            meta = {"threshold": threshold, "source": args.inp}
+            out_fp.write(b"".join(dumps_line(out_record(doc_id_base, i, rec, meta))
+                                  for i, rec in enumerate(flagged, start=1)))
 
         else:  # jsonl
-            # Iterate input lines as records
-            line_no = 0
-            for obj in iter_jsonl(raw.splitlines()):
-                line_no += 1
-                text = obj.get(args.text_field, "")
-                if not isinstance(text, str) or not text.strip():
-                    continue
-                doc_id = str(obj.get(args.id_field, f"{doc_id_base}#{line_no}"))
-                flagged = detect_sentences(text, cfg, threshold)
-                sid = 0
-                for rec in flagged:
-                    sid += 1
-                    out = {
-                        "doc_id": doc_id,
-                        "sentence_id": sid,
-                        "span": rec["span"],
-                        "sentence": rec["sentence"],
-                        "score": rec["score"],
-                        "labels": rec["labels"],
-                        "matched_patterns": rec["matched_patterns"],
-                        "meta": {"threshold": threshold, "source": args.inp, "jsonl_line": line_no}
-                    }
-                    out_fp.write(json.dumps(out, ensure_ascii=False) + "\n")
+            job = {"threshold": threshold, "source": args.inp, "doc_id_base": doc_id_base,
+                   "text_field": args.text_field, "id_field": args.id_field}
+            # Batches carry raw lines: the parent only reads, workers parse.
+            records = enumerate(iter_lines(itertools.chain(io.StringIO(sample), in_fp)), start=1)
+            chunks = iter_chunks(records, max(1, args.batch_size))
+            head = list(itertools.islice(chunks, 2))
+            if args.workers <= 1 or len(head) < 2:
+                # A single batch is not worth the process start-up cost.
+                for chunk in itertools.chain(head, chunks):
+                    out_fp.write(scan_jsonl_chunk(chunk, cfg, job))
+            else:
+                with ProcessPoolExecutor(max_workers=args.workers, initializer=_worker_init,
+                                         initargs=(str(pat_path), job)) as ex:
+                    # Not ex.map(): it submits the whole input up front. Keep a
+                    # bounded window of batches in flight and write them in
+                    # submission order, so output order matches input.
+                    pending: deque = deque()
+                    for chunk in itertools.chain(head, chunks):
+                        pending.append(ex.submit(_scan_chunk, chunk))
+                        if len(pending) >= 2 * args.workers:
+                            out_fp.write(pending.popleft().result())
+                    while pending:
+                        out_fp.write(pending.popleft().result())
 
     finally:
-        if out_fp is not sys.stdout:
+        if in_fp is not sys.stdin:
+            in_fp.close()
+        if out_fp is not sys.stdout.buffer:
             out_fp.close()
+        else:
+            out_fp.flush()
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,33 @@
-import os, json, time, uuid
-from typing import List, Dict, Any, Optional
+from __future__ import annotations
+import os, json, time, uuid, asyncio, inspect, weakref, hashlib, sqlite3, threading, pathlib, contextlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 from tenacity import retry, wait_random_exponential, stop_after_attempt
-from openai import OpenAI, APIError, RateLimitError
+from openai import OpenAI, AsyncOpenAI, APIError, RateLimitError
+from openai.types.chat import ChatCompletion
+
+if TYPE_CHECKING:
+    import numpy as np  # only the opt-in semantic tier needs numpy; imported lazily there
 
 OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+CACHE_PATH = os.getenv("POLIS_CHAT_CACHE", ".polis_cache/chat.sqlite3")
+EMBED_MODEL = "text-embedding-3-small"
+SEMANTIC_THRESHOLD = 0.97
+MEMORY_ENTRIES = 256  # hot exact-tier replies kept in process; sqlite holds the rest
+
+# httpx connection pools are bound to the loop that opened them, and every
+# asyncio.run() call gets a fresh loop, so keep one async client per loop.
+_aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+def aclient() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    c = _aclients.get(loop)
+    if c is None:
+        c = _aclients[loop] = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return c
+
 def _idem_key() -> str:
     return str(uuid.uuid4())
 
@@ -14,14 +36,135 @@ def _retry_after(e: Exception) -> float:
     try: return max(1.0, float(ra)) if ra else 1.5
     except: return 1.5
 
-@retry(wait=wait_random_exponential(multiplier=1, max=20),
-       stop=stop_after_attempt(6))
-def create_chat(messages: List[Dict[str, Any]],
-                model: str = "gpt-4o-mini",
-                tools: Optional[List[Dict[str, Any]]] = None,
-                tool_choice: Optional[str] = "auto",
-                timeout: int = 30,
-                idempotency_key: Optional[str] = None):
+class ChatCache:
+    """Two-tier response cache: exact request hash, then cosine nearest neighbour
+    on the final user message among requests that share everything else.
+    sqlite errors (e.g. a busy lock shared by several uvicorn workers) degrade
+    to a miss or a skipped write; they never fail the chat call itself."""
+
+    def __init__(self, path: str):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # A short busy timeout: waiting on another worker's lock costs more than a miss.
+        self._db = sqlite3.connect(path, timeout=1.0, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS chat_cache ("
+                         "key TEXT PRIMARY KEY, scope TEXT NOT NULL, embedding BLOB, response TEXT NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chat_cache_scope ON chat_cache (scope)")
+        self._lock = threading.Lock()
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        self._vectors: Dict[str, Tuple[List[str], np.ndarray]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._exact.get(key)
+            if hit is not None:
+                self._exact.move_to_end(key)
+                return hit
+            try:
+                row = self._db.execute("SELECT response FROM chat_cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+            if row:
+                self._remember(key, row[0])
+                return row[0]
+            return None
+
+    def nearest(self, scope: str, vec: np.ndarray) -> Optional[str]:
+        with self._lock:
+            try:
+                keys, mat = self._scope_vectors(scope)
+            except sqlite3.Error:
+                return None
+        if not keys:
+            return None
+        sims = mat @ vec
+        i = int(sims.argmax())
+        return self.get(keys[i]) if sims[i] >= SEMANTIC_THRESHOLD else None
+
+    def put(self, key: str, scope: str, vec: Optional[np.ndarray], response: str) -> None:
+        with self._lock:
+            try:
+                self._db.execute("INSERT OR REPLACE INTO chat_cache VALUES (?, ?, ?, ?)",
+                                 (key, scope, None if vec is None else vec.tobytes(), response))
+                self._db.commit()
+            except sqlite3.Error:
+                with contextlib.suppress(sqlite3.Error):
+                    self._db.rollback()
+                return
+            self._remember(key, response)
+            if vec is not None and scope in self._vectors:
+                import numpy as np
+                keys, mat = self._vectors[scope]
+                self._vectors[scope] = (keys + [key], np.vstack([mat, vec]) if keys else vec[None, :])
+
+    def _remember(self, key: str, response: str) -> None:
+        self._exact[key] = response
+        self._exact.move_to_end(key)
+        if len(self._exact) > MEMORY_ENTRIES:
+            self._exact.popitem(last=False)
+
+    def _scope_vectors(self, scope: str) -> Tuple[List[str], np.ndarray]:
+        if scope not in self._vectors:
+            import numpy as np
+            rows = self._db.execute("SELECT key, embedding FROM chat_cache "
+                                    "WHERE scope = ? AND embedding IS NOT NULL", (scope,)).fetchall()
+            mat = (np.vstack([np.frombuffer(b, dtype=np.float32) for _, b in rows]) if rows
+                   else np.empty((0, 0), dtype=np.float32))
+            self._vectors[scope] = ([k for k, _ in rows], mat)
+        return self._vectors[scope]
+
+_chat_cache: Optional[ChatCache] = None
+
+def _cache() -> Optional[ChatCache]:
+    global _chat_cache
+    if os.getenv("POLIS_CACHE_DISABLE") == "1":
+        return None
+    if _chat_cache is None:
+        try:
+            _chat_cache = ChatCache(CACHE_PATH)
+        except (OSError, sqlite3.Error):
+            return None  # unusable cache path; run uncached and retry next call
+    return _chat_cache
+
+def _digest(obj: Any) -> str:
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+def _cache_keys(messages: List[Dict[str, Any]],
+                model: str,
+                tools: Optional[List[Dict[str, Any]]],
+                tool_choice: Optional[str],
+                response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, str, Optional[str]]:
+    """Return (exact key, semantic scope, text to embed). Only plain chats ending in a
+    user message are eligible for semantic hits; tool turns must match exactly.
+    The whole final message is embedded, so the semantic tier only suits callers
+    whose last message is the free-form query itself, not a fixed template."""
+    key = _digest({"model": model, "tools": tools, "tool_choice": tool_choice,
+                   "response_format": response_format, "messages": messages})
+    scope = _digest({"model": model, "response_format": response_format, "messages": messages[:-1]})
+    last = messages[-1] if messages else {}
+    query = last.get("content") if not tools and last.get("role") == "user" else None
+    return key, scope, (query if isinstance(query, str) else None)
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    import numpy as np
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+def _embed(text: str) -> Optional[np.ndarray]:
+    # A failed embedding only costs the semantic tier, never the chat itself.
+    try:
+        return _unit(client.embeddings.create(model=EMBED_MODEL, input=text).data[0].embedding)
+    except Exception:
+        return None
+
+def _chat_kwargs(messages: List[Dict[str, Any]],
+                 model: str,
+                 tools: Optional[List[Dict[str, Any]]],
+                 tool_choice: Optional[str],
+                 timeout: int,
+                 idempotency_key: Optional[str],
+                 response_format: Optional[Dict[str, Any]] = None,
+                 stream: bool = False) -> Dict[str, Any]:
     headers = {"Idempotency-Key": idempotency_key or _idem_key()}
     kwargs: Dict[str, Any] = {
         "model": model,
@@ -34,7 +177,23 @@ def create_chat(messages: List[Dict[str, Any]],
         kwargs["tools"] = tools
         if tool_choice:
             kwargs["tool_choice"] = tool_choice
+    if response_format:
+        kwargs["response_format"] = response_format
+    if stream:
+        kwargs["stream"] = True
+    return kwargs
 
+@retry(wait=wait_random_exponential(multiplier=1, max=20),
+       stop=stop_after_attempt(6))
+def _create_chat(messages: List[Dict[str, Any]],
+                 model: str = "gpt-4o-mini",
+                 tools: Optional[List[Dict[str, Any]]] = None,
+                 tool_choice: Optional[str] = "auto",
+                 timeout: int = 30,
+                 idempotency_key: Optional[str] = None,
+                 response_format: Optional[Dict[str, Any]] = None,
+                 stream: bool = False):
+    kwargs = _chat_kwargs(messages, model, tools, tool_choice, timeout, idempotency_key, response_format, stream)
     try:
         return client.chat.completions.create(**kwargs)
     except RateLimitError as e:
@@ -44,17 +203,145 @@ def create_chat(messages: List[Dict[str, Any]],
             time.sleep(1.5); raise
         raise
 
-def chat_with_tools(user_prompt: str,
-                    tools: Optional[List[Dict[str, Any]]] = None,
-                    exec_map: Optional[Dict[str, Any]] = None,
-                    model: str = "gpt-4o-mini") -> str:
+# tenacity's @retry detects coroutine functions and retries them with AsyncRetrying.
+@retry(wait=wait_random_exponential(multiplier=1, max=20),
+       stop=stop_after_attempt(6))
+async def _acreate_chat(messages: List[Dict[str, Any]],
+                        model: str = "gpt-4o-mini",
+                        tools: Optional[List[Dict[str, Any]]] = None,
+                        tool_choice: Optional[str] = "auto",
+                        timeout: int = 30,
+                        idempotency_key: Optional[str] = None,
+                        response_format: Optional[Dict[str, Any]] = None,
+                        stream: bool = False):
+    kwargs = _chat_kwargs(messages, model, tools, tool_choice, timeout, idempotency_key, response_format, stream)
+    try:
+        return await aclient().chat.completions.create(**kwargs)
+    except RateLimitError as e:
+        await asyncio.sleep(_retry_after(e)); raise
+    except APIError as e:
+        if getattr(e, "status_code", None) in (500, 502, 503, 504, 408):
+            await asyncio.sleep(1.5); raise
+        raise
+
+# (store, exact key, semantic scope, query embedding) to file a fresh reply under.
+_CacheEntry = Tuple[ChatCache, str, str, Any]
+
+def _cache_lookup(messages: List[Dict[str, Any]],
+                  model: str,
+                  tools: Optional[List[Dict[str, Any]]],
+                  tool_choice: Optional[str],
+                  response_format: Optional[Dict[str, Any]],
+                  stream: bool,
+                  cache: bool,
+                  semantic: bool) -> Tuple[Optional[_CacheEntry], Optional[str]]:
+    """Return (entry to store the reply under, cached reply). Blocking (sqlite, and
+    the embedding call on the semantic path), so async callers run it in a thread.
+    Streams are consumed incrementally by the caller, so they are never cached.
+    The semantic tier is opt-in: a near-duplicate hit replays the reply to a
+    *different* request, which is wrong for rewrites of the user's own text."""
+    store = _cache() if cache and not stream else None
+    if store is None:
+        return None, None
+    key, scope, query = _cache_keys(messages, model, tools, tool_choice, response_format)
+    hit = store.get(key)
+    vec = None
+    if hit is None and semantic and query is not None:
+        vec = _embed(query)
+        hit = store.nearest(scope, vec) if vec is not None else None
+    return (store, key, scope, vec), hit
+
+def _cache_store(entry: Optional[_CacheEntry], resp: ChatCompletion) -> None:
+    if entry is not None:
+        store, key, scope, vec = entry
+        store.put(key, scope, vec, resp.model_dump_json())
+
+def create_chat(messages: List[Dict[str, Any]],
+                model: str = "gpt-4o-mini",
+                tools: Optional[List[Dict[str, Any]]] = None,
+                tool_choice: Optional[str] = "auto",
+                timeout: int = 30,
+                idempotency_key: Optional[str] = None,
+                response_format: Optional[Dict[str, Any]] = None,
+                stream: bool = False,
+                cache: bool = True,
+                semantic: bool = False):
+    entry, hit = _cache_lookup(messages, model, tools, tool_choice, response_format, stream, cache, semantic)
+    if hit is not None:
+        return ChatCompletion.model_validate_json(hit)
+    resp = _create_chat(messages, model, tools, tool_choice, timeout, idempotency_key, response_format, stream)
+    _cache_store(entry, resp)
+    return resp
+
+async def acreate_chat(messages: List[Dict[str, Any]],
+                       model: str = "gpt-4o-mini",
+                       tools: Optional[List[Dict[str, Any]]] = None,
+                       tool_choice: Optional[str] = "auto",
+                       timeout: int = 30,
+                       idempotency_key: Optional[str] = None,
+                       response_format: Optional[Dict[str, Any]] = None,
+                       stream: bool = False,
+                       cache: bool = True,
+                       semantic: bool = False):
+    # sqlite calls can wait on another worker's write lock; keep them off the loop.
+    entry, hit = None, None
+    if cache and not stream:
+        entry, hit = await asyncio.to_thread(_cache_lookup, messages, model, tools, tool_choice,
+                                             response_format, stream, cache, semantic)
+    if hit is not None:
+        return ChatCompletion.model_validate_json(hit)
+    resp = await _acreate_chat(messages, model, tools, tool_choice, timeout, idempotency_key, response_format, stream)
+    if entry is not None:
+        await asyncio.to_thread(_cache_store, entry, resp)
+    return resp
+
+async def abatch_chat(prompts: List[str],
+                      system: Optional[str] = None,
+                      model: str = "gpt-4o-mini",
+                      concurrency: int = 16) -> List[str]:
+    """Run one independent chat per prompt, at most `concurrency` in flight; results keep prompt order."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(prompt: str) -> str:
+        messages = [{"role":"system","content":system}] if system else []
+        messages.append({"role":"user","content":prompt})
+        async with sem:
+            resp = await acreate_chat(messages, model=model)
+        return resp.choices[0].message.content or ""
+
+    return await asyncio.gather(*(one(p) for p in prompts))
+
+def batch_chat(prompts: List[str],
+               system: Optional[str] = None,
+               model: str = "gpt-4o-mini",
+               concurrency: int = 16) -> List[str]:
+    return asyncio.run(abatch_chat(prompts, system=system, model=model, concurrency=concurrency))
+
+async def _run_tool(exec_map: Dict[str, Any], tc: Any) -> Any:
+    args = tc.function.arguments or "{}"
+    try:
+        parsed = json.loads(args)
+    except Exception:
+        parsed = {}
+    fn = exec_map.get(tc.function.name)
+    if not fn:
+        return "(unknown tool)"
+    # Tool calls within one turn are independent; sync tools run on worker threads.
+    if inspect.iscoroutinefunction(fn):
+        return await fn(parsed)
+    return await asyncio.to_thread(fn, parsed)
+
+async def achat_with_tools(user_prompt: str,
+                           tools: Optional[List[Dict[str, Any]]] = None,
+                           exec_map: Optional[Dict[str, Any]] = None,
+                           model: str = "gpt-4o-mini") -> str:
     exec_map = exec_map or {}
     tools = tools or []
     has_tools = bool(tools)
 
     messages = [{"role":"user","content":user_prompt}]
-    resp = create_chat(messages, model=model, tools=(tools if has_tools else None),
-                       tool_choice=("auto" if has_tools else None))
+    resp = await acreate_chat(messages, model=model, tools=(tools if has_tools else None),
+                              tool_choice=("auto" if has_tools else None))
 
     while True:
         msg = resp.choices[0].message
@@ -65,18 +352,17 @@ def chat_with_tools(user_prompt: str,
         messages.append({"role":"assistant","content":msg.content,
                          "tool_calls":[tc.model_dump() for tc in tcs]})
 
-        for tc in tcs:
-            name = tc.function.name
-            args = tc.function.arguments or "{}"
-            try:
-                parsed = json.loads(args)
-            except Exception:
-                parsed = {}
-            fn = exec_map.get(name)
-            out = "(unknown tool)" if not fn else fn(parsed)
+        outs = await asyncio.gather(*(_run_tool(exec_map, tc) for tc in tcs))
+        for tc, out in zip(tcs, outs):
             messages.append({
-                "role":"tool", "tool_call_id":tc.id, "name":name, "content":str(out)
+                "role":"tool", "tool_call_id":tc.id, "name":tc.function.name, "content":str(out)
             })
 
-        resp = create_chat(messages, model=model, tools=(tools if has_tools else None),
-                           tool_choice=("auto" if has_tools else None))
+        resp = await acreate_chat(messages, model=model, tools=(tools if has_tools else None),
+                                  tool_choice=("auto" if has_tools else None))
+
+def chat_with_tools(user_prompt: str,
+                    tools: Optional[List[Dict[str, Any]]] = None,
+                    exec_map: Optional[Dict[str, Any]] = None,
+                    model: str = "gpt-4o-mini") -> str:
+    return asyncio.run(achat_with_tools(user_prompt, tools=tools, exec_map=exec_map, model=model))
@@ -0,0 +1,41 @@
+import json, pathlib, subprocess, sys
+import pytest
+from detect_pd import compile_cfg, detect_sentences, load_cfg, scan_jsonl_chunk
+
+SENTENCES = [
+    "Many people are saying it might be rigged.",
+    "Many people\xa0are saying it might be rigged.",
+    "Everybody knows the count was off, some say.",
+    "They say it's true, but I don't know.",
+    "The council met on Tuesday to approve the budget.",
+]
+
+def _cfg():
+    return compile_cfg(load_cfg(pathlib.Path("plausible_deniability_patterns.json")))
+
+def test_unicode_whitespace_is_scored_like_ascii():
+    cfg = _cfg()
+    ascii_hit, nbsp_hit = (detect_sentences(s, cfg, 0.0) for s in SENTENCES[:2])
+    assert [r["score"] for r in nbsp_hit] == [r["score"] for r in ascii_hit]
+
+def test_re2_set_matches_re_fallback():
+    pytest.importorskip("re2")
+    with_set, without_set = _cfg(), _cfg()
+    assert with_set["_pattern_set"] is not None
+    without_set["_pattern_set"] = None
+    for s in SENTENCES:
+        assert detect_sentences(s, with_set, 0.0) == detect_sentences(s, without_set, 0.0), s
+
+def test_batched_and_pooled_runs_match_the_serial_scan(tmp_path):
+    records = [{"doc_id": f"d{i}", "text": f"{s} And then the vote was held."} for i, s in enumerate(SENTENCES * 3)]
+    records.append({"text": "People are saying it, and everybody knows it."})  # no doc_id: falls back to name#line
+    src = tmp_path / "in.jsonl"
+    src.write_text("\n".join(json.dumps(r) for r in records) + "\n\n", encoding="utf-8")
+    job = {"threshold": 0.0, "source": str(src), "doc_id_base": "in.jsonl", "text_field": "text", "id_field": "doc_id"}
+    serial = scan_jsonl_chunk([(i, json.dumps(r)) for i, r in enumerate(records, start=1)], _cfg(), job)
+    assert serial.count(b"\n") > len(SENTENCES)
+    for workers in ("1", "2"):
+        run = subprocess.run([sys.executable, "detect_pd.py", "--in", str(src), "--threshold", "0",
+                              "--batch-size", "2", "--workers", workers],
+                             capture_output=True, check=True)
+        assert run.stdout == serial, workers
@@ -0,0 +1,82 @@
+import asyncio, os
+import pytest
+
+pytest.importorskip("openai")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import openai_client as oc
+from openai.types.chat import ChatCompletion
+
+def _reply(text):
+    return ChatCompletion.model_validate({
+        "id": "cmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+    })
+
+def _msgs(text):
+    return [{"role": "system", "content": "Polish."}, {"role": "user", "content": text}]
+
+def _text(resp):
+    return resp.choices[0].message.content
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Point the cache at a fresh sqlite file and stub both completion calls; the
+    returned list records the user message of every request that reached the API."""
+    calls = []
+    def fake(messages, *args, **kwargs):
+        calls.append(messages[-1]["content"])
+        return _reply(messages[-1]["content"].upper())
+    async def afake(messages, *args, **kwargs):
+        return fake(messages)
+    monkeypatch.delenv("POLIS_CACHE_DISABLE", raising=False)
+    monkeypatch.setattr(oc, "CACHE_PATH", str(tmp_path / "chat.sqlite3"))
+    monkeypatch.setattr(oc, "_chat_cache", None)
+    monkeypatch.setattr(oc, "_create_chat", fake)
+    monkeypatch.setattr(oc, "_acreate_chat", afake)
+    return calls
+
+def test_exact_hit_skips_the_api(api):
+    first = oc.create_chat(_msgs("rally tuesday"))
+    again = oc.create_chat(_msgs("rally tuesday"))
+    assert _text(first) == _text(again) == "RALLY TUESDAY"
+    assert api == ["rally tuesday"]
+
+def test_miss_is_stored_in_sqlite(api):
+    oc.create_chat(_msgs("rally tuesday"))
+    oc.create_chat(_msgs("rally wednesday"))
+    assert api == ["rally tuesday", "rally wednesday"]
+    # A fresh process (new ChatCache) replays from the file, not from memory.
+    oc._chat_cache = None
+    assert _text(oc.create_chat(_msgs("rally wednesday"))) == "RALLY WEDNESDAY"
+    assert len(api) == 2
+
+def test_async_path_shares_the_cache(api):
+    async def run():
+        return [_text(await oc.acreate_chat(_msgs("town hall"))) for _ in range(2)]
+    assert asyncio.run(run()) == ["TOWN HALL", "TOWN HALL"]
+    assert _text(oc.create_chat(_msgs("town hall"))) == "TOWN HALL"
+    assert api == ["town hall"]
+
+def test_sqlite_failure_degrades_to_a_miss(api):
+    oc.create_chat(_msgs("warm up"))
+    oc._chat_cache._db.close()  # every query now raises sqlite3.ProgrammingError
+    assert _text(oc.create_chat(_msgs("rally tuesday"))) == "RALLY TUESDAY"
+    assert _text(oc.create_chat(_msgs("rally friday"))) == "RALLY FRIDAY"
+    assert api == ["warm up", "rally tuesday", "rally friday"]
+
+def test_cache_disable_env_bypasses_the_cache(api, monkeypatch):
+    monkeypatch.setenv("POLIS_CACHE_DISABLE", "1")
+    oc.create_chat(_msgs("rally tuesday"))
+    oc.create_chat(_msgs("rally tuesday"))
+    assert api == ["rally tuesday", "rally tuesday"]
+    assert oc._chat_cache is None
+
+def test_semantic_tier_is_opt_in(api, monkeypatch):
+    pytest.importorskip("numpy")
+    # Every text embeds to the same vector, so any semantic lookup is a hit.
+    monkeypatch.setattr(oc, "_embed", lambda text: oc._unit([1.0, 0.0]))
+    oc.create_chat(_msgs("rally tuesday"))
+    assert _text(oc.create_chat(_msgs("rally wednesday"))) == "RALLY WEDNESDAY"
+    oc.create_chat(_msgs("town hall monday"), semantic=True)
+    assert _text(oc.create_chat(_msgs("town hall friday"), semantic=True)) == "TOWN HALL MONDAY"
+    assert api == ["rally tuesday", "rally wednesday", "town hall monday"]
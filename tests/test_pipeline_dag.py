@@ -0,0 +1,93 @@
+import threading
+from apps.backend.pipeline.base import register_stage, run_pipeline, _generations
+
+@register_stage("t_dag_seed", reads=(), writes=("text",))
+def _seed(data, params, ctx):
+    return {"text": "Town hall rally"}
+
+# Both slow stages must reach the barrier together, which only happens when
+# they run concurrently; run sequentially, the first one times out.
+_MEET = threading.Barrier(2, timeout=5)
+
+@register_stage("t_dag_slow_a", reads=("text",), writes=("a",))
+def _slow_a(data, params, ctx):
+    _MEET.wait()
+    data["a"] = data["text"].upper()
+    return data
+
+@register_stage("t_dag_slow_b", reads=("text",), writes=("b",))
+def _slow_b(data, params, ctx):
+    _MEET.wait()
+    data["b"] = len(data["text"])
+    data["stray"] = True  # undeclared keys are not merged back
+    return data
+
+@register_stage("t_dag_barrier")
+def _barrier(data, params, ctx):
+    data["keys"] = sorted(data)
+    return data
+
+def test_independent_stages_share_a_generation():
+    plan = [("t_dag_seed", {}), ("t_dag_slow_a", {}), ("t_dag_slow_b", {}), ("t_dag_barrier", {})]
+    assert _generations(plan) == [[0], [1, 2], [3]]
+
+def test_parallel_generation_merges_declared_writes():
+    plan = [("t_dag_seed", {}), ("t_dag_slow_a", {}), ("t_dag_slow_b", {}), ("t_dag_barrier", {})]
+    ctx = {}
+    out = run_pipeline(plan, {}, ctx)
+    assert out["a"] == "TOWN HALL RALLY" and out["b"] == 15
+    assert out["keys"] == ["a", "b", "text"]
+    assert [t["stage"] for t in ctx["timings"]] == [s for s, _ in plan]
+
+@register_stage("t_dag_meta", reads=(), writes=("run_id",))
+def _meta(data, params, ctx):
+    return {"run_id": "r1", "scratch": 1}
+
+@register_stage("t_dag_pair", reads=(), writes=("z", "y", "x"))
+def _pair(data, params, ctx):
+    return {"x": 1, "y": 2, "z": 3}
+
+def test_declared_writes_merge_the_same_alone_or_in_parallel():
+    alone = run_pipeline([("t_dag_meta", {}), ("t_dag_barrier", {})], {}, {})
+    shared = run_pipeline([("t_dag_meta", {}), ("t_dag_seed", {}), ("t_dag_barrier", {})], {}, {})
+    assert _generations([("t_dag_meta", {}), ("t_dag_seed", {})]) == [[0, 1]]
+    assert alone["keys"] == ["run_id"]
+    assert shared["keys"] == ["run_id", "text"]
+
+def test_merged_keys_follow_stage_output_order():
+    out = run_pipeline([("t_dag_pair", {})], {"w": 0}, {})
+    assert list(out) == ["w", "x", "y", "z"]
+
+_COUNT_CALLS = []
+
+@register_stage("t_cache_count", reads=("text",), writes=("n",), cacheable=True)
+def _count(data, params, ctx):
+    _COUNT_CALLS.append(1)
+    data["n"] = len(data["text"]) * params.get("mult", 1)
+    return data
+
+def test_cacheable_stage_replays_from_disk(tmp_path):
+    del _COUNT_CALLS[:]
+    runs = []
+    for mult in (2, 2, 3):
+        ctx = {"cache_dir": str(tmp_path)}
+        out = run_pipeline([("t_cache_count", {"mult": mult})], {"text": "abc"}, ctx)
+        runs.append((out["n"], ctx["timings"][0]["cached"]))
+    assert runs == [(6, False), (6, True), (9, False)]
+    assert len(_COUNT_CALLS) == 2
+
+_LOSSY_CALLS = []
+
+@register_stage("t_cache_lossy", reads=("text",), writes=("tags", "span"), cacheable=True)
+def _lossy(data, params, ctx):
+    _LOSSY_CALLS.append(1)
+    return {"tags": {data["text"]}, "span": (0, len(data["text"]))}
+
+def test_outputs_that_do_not_round_trip_are_not_cached(tmp_path):
+    del _LOSSY_CALLS[:]
+    for _ in range(2):
+        ctx = {"cache_dir": str(tmp_path)}
+        out = run_pipeline([("t_cache_lossy", {})], {"text": "abc"}, ctx)
+        assert out["tags"] == {"abc"} and out["span"] == (0, 3)
+        assert not ctx["timings"][0]["cached"]
+    assert len(_LOSSY_CALLS) == 2
@@ -11,3 +11,33 @@ def test_pipeline_smoke():
     validate(instance=data, schema=schema)
     for k in ["doc_id","title","date","primary_label_id","score"]:
         assert k in data
+
+def test_artifact_matches_output_when_stages_follow_the_writer(tmp_path):
+    art = tmp_path / "out.json"
+    cfg = tmp_path / "p.toml"
+    cfg.write_text('stages = ["example_parse", { name = "example_write", out = "%s" }, "my_real_stage"]\n'
+                   % art.as_posix(), encoding="utf-8")
+    out = run_from_config(str(cfg), env={"POLIS_CACHE_DISABLE": "1"})
+    assert "my_result" in out
+    assert json.loads(art.read_text(encoding="utf-8")) == out
+
+def test_example_write_accepts_int_keys(tmp_path):
+    from apps.backend.pipeline.base import get_stage
+    from apps.backend.pipeline.orchestrator import _auto_import_stages
+    _auto_import_stages()
+    out = tmp_path / "out.json"
+    get_stage("example_write")({"by_year": {2024: 3}}, {"out": str(out)}, {})
+    assert json.loads(out.read_text(encoding="utf-8")) == {"by_year": {"2024": 3}}
+
+def test_load_plan_is_cached_until_config_changes(tmp_path):
+    import os
+    from apps.backend.pipeline.orchestrator import _load_plan
+    cfg = tmp_path / "p.toml"
+    cfg.write_text('stages = [{ name = "example_label", k = 1 }]\n', encoding="utf-8")
+    first = _load_plan(str(cfg))
+    first[0][1]["k"] = 99  # callers get their own params
+    assert _load_plan(str(cfg)) == [("example_label", {"k": 1})]
+    cfg.write_text('stages = ["my_real_stage"]\n', encoding="utf-8")
+    st = cfg.stat()
+    os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert _load_plan(str(cfg)) == [("my_real_stage", {})]
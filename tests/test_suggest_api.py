@@ -0,0 +1,77 @@
+import os
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("openai")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from fastapi.testclient import TestClient
+import api.suggest as suggest
+
+def _reply(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+@pytest.fixture
+def client():
+    return TestClient(suggest.app)
+
+@pytest.fixture
+def per_sentence(monkeypatch):
+    """Stub the per-sentence fallback; returns the list of prompts it received."""
+    seen = []
+    async def fake(prompts, system=None, model="gpt-4o-mini", concurrency=16):
+        seen.extend(prompts)
+        return [f"polished {i}" for i in range(len(prompts))]
+    monkeypatch.setattr(suggest, "abatch_chat", fake)
+    return seen
+
+def _batch_reply(monkeypatch, content):
+    async def fake(messages, **kwargs):
+        assert kwargs["response_format"] == {"type": "json_object"}
+        return _reply(content)
+    monkeypatch.setattr(suggest, "acreate_chat", fake)
+
+def test_batch_uses_the_single_completion(client, monkeypatch, per_sentence):
+    _batch_reply(monkeypatch, '{"sentences": ["One.", "Two."]}')
+    r = client.post("/enhance/batch", json={"sentences": ["one", "two"]})
+    assert r.status_code == 200 and r.json() == {"enhanced": ["One.", "Two."]}
+    assert per_sentence == []
+
+@pytest.mark.parametrize("content", ['{"sentences": ["One and two."]}', "not json", '{"other": []}', None])
+def test_batch_falls_back_to_per_sentence_calls(client, monkeypatch, per_sentence, content):
+    _batch_reply(monkeypatch, content)
+    r = client.post("/enhance/batch", json={"sentences": ["one", " two "]})
+    assert r.status_code == 200 and r.json() == {"enhanced": ["polished 0", "polished 1"]}
+    assert per_sentence == [suggest._prompt("one"), suggest._prompt("two")]
+
+def test_batch_rejects_empty_input(client):
+    for body in ({"sentences": []}, {"sentences": ["ok", "  "]}, {"sentence": "one"}):
+        assert client.post("/enhance/batch", json=body).status_code == 400
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+def test_stream_frames_each_delta_as_json_sse(client, monkeypatch):
+    async def tokens():
+        for c in (_chunk("Join us"), _chunk(None), SimpleNamespace(choices=[]), _chunk(" at the\nrally.")):
+            yield c
+    async def fake(messages, **kwargs):
+        assert kwargs.get("stream") is True
+        return tokens()
+    monkeypatch.setattr(suggest, "acreate_chat", fake)
+    r = client.post("/enhance", json={"sentence": "join us at the rally", "stream": True})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    # The embedded newline is JSON-escaped, so it cannot end the SSE event early.
+    assert r.text == ('data: {"delta":"Join us"}\n\n'
+                      'data: {"delta":" at the\\nrally."}\n\n'
+                      "data: [DONE]\n\n")
+
+def test_stream_is_rejected_with_a_sentence_list(client, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("no model call expected")
+    monkeypatch.setattr(suggest, "acreate_chat", fail)
+    monkeypatch.setattr(suggest, "abatch_chat", fail)
+    r = client.post("/enhance", json={"sentences": ["one", "two"], "stream": True})
+    assert r.status_code == 400 and "stream" in r.json()["error"]
+    assert client.post("/enhance", json={"sentences": []}).status_code == 400